@@ -1,7 +1,9 @@
 import streamlit as st
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterator
 from pydantic import BaseModel, Field
 
 # OCR / File processing
@@ -21,15 +23,38 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 import base64
+import gzip
+import hashlib
+import itertools
+import logging
 import os
-import json
+import re
+import threading
+import orjson
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # =============================
 # 1. LOAD ENVIRONMENT VARIABLES
 # =============================
-load_dotenv()
-API_KEY = os.getenv("GOOGLE_API_KEY")
+# No spinner: this runs before st.set_page_config, which must be the first element
+@st.cache_resource(show_spinner=False)
+def load_api_key() -> Optional[str]:
+    """Read .env once per process rather than on every rerun"""
+    load_dotenv()
+    return os.getenv("GOOGLE_API_KEY")
+
+API_KEY = load_api_key()
+
+@st.cache_resource
+def get_llm(temperature: float) -> ChatGoogleGenerativeAI:
+    """Build the Gemini client once per process instead of on every call"""
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        google_api_key=API_KEY,
+        temperature=temperature
+    )
 
 # =============================
 # 2. PYDANTIC SCHEMA
@@ -83,18 +108,7 @@ def extract_text_from_pdf(file):
         text = f"Error extracting text from PDF: {str(e)}"
     return text
 
-def analyze_medical_report(report_text: str) -> str:
-    """Analyze uploaded medical report and provide summary"""
-    if not API_KEY:
-        return "API Key missing for report analysis"
-    
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=API_KEY,
-        temperature=0.2
-    )
-    
-    prompt = f"""As a medical professional, analyze this medical report/text and provide a detailed summary:
+REPORT_ANALYSIS_PROMPT = """As a medical professional, analyze this medical report/text and provide a detailed summary:
     
     {report_text}
     
@@ -106,37 +120,94 @@ def analyze_medical_report(report_text: str) -> str:
     5. Any important notes for current consultation
     
     Summary:"""
-    
-    try:
-        response = llm.invoke([HumanMessage(content=prompt)])
-        return response.content
-    except:
-        return "Could not analyze report automatically. Please discuss with Dr. Khan."
 
-# =============================
-# 4. ENHANCED DOCTOR CHATBOT
-# =============================
+# Summaries used when a report cannot be sent to Gemini
+REPORT_ANALYSIS_FALLBACK = "Could not analyze report automatically. Please discuss with Dr. Khan."
+REPORT_API_KEY_MISSING = "API Key missing for report analysis"
+
+# Cheap pre-checks that answer trivial reports without calling Gemini
+ALNUM_RE = re.compile(r"[^\W_]")
+SHORT_REPORT_CHARS = 300
 
-def get_chat_response(messages: List, user_input: str, uploaded_reports: List = None) -> str:
-    """Get response from Gemini with detailed doctor-like behavior"""
+def is_readable_report(report_text: str) -> bool:
+    """Only OCR output without a single letter or digit is unreadable"""
+    return ALNUM_RE.search(report_text) is not None
+
+def quick_report_summary(report_text: str) -> Optional[str]:
+    """Summarize trivial reports directly; None means the LLM is needed"""
+    # Short notes fit in the chat context as-is, a summary would not be shorter
+    text = " ".join(report_text.split())
+    if len(text) <= SHORT_REPORT_CHARS:
+        return text
+    return None
+
+# Summaries of reports already analyzed, keyed by a hash of the normalized text
+SUMMARY_CACHE_SIZE = 1024
+
+@st.cache_resource
+def get_summary_cache():
+    """Process-wide LRU store of report summaries and the lock guarding it"""
+    return OrderedDict(), threading.Lock()
+
+def report_text_key(report_text: str) -> bytes:
+    """Hash case- and whitespace-normalized report text"""
+    normalized = " ".join(report_text.lower().split())
+    return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+def analyze_medical_reports(report_texts: List[str]) -> List[str]:
+    """Analyze uploaded medical reports in one batched call and provide summaries"""
+    cache, lock = get_summary_cache()
+    summaries = [quick_report_summary(text) for text in report_texts]
+    
+    # Identical texts (cached, or repeated within this upload) share one LLM call
+    pending = {}
+    for i, text in enumerate(report_texts):
+        if summaries[i] is not None:
+            continue
+        key = report_text_key(text)
+        with lock:
+            if key in cache:
+                cache.move_to_end(key)
+                summaries[i] = cache[key]
+                continue
+        pending.setdefault(key, []).append(i)
+    if not pending:
+        return summaries
+    
     if not API_KEY:
-        raise ValueError("API Key missing!")
+        for indices in pending.values():
+            for i in indices:
+                summaries[i] = REPORT_API_KEY_MISSING
+        return summaries
     
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=API_KEY,
-        temperature=0.3
-    )
+    llm = get_llm(0.2)
     
-    # Add context about uploaded reports
-    reports_context = ""
-    if uploaded_reports and len(uploaded_reports) > 0:
-        reports_context = "\n\nPREVIOUS MEDICAL REPORTS UPLOADED:\n"
-        for i, report in enumerate(uploaded_reports, 1):
-            reports_context += f"Report {i} ({report['filename']}): {report['summary'][:300]}...\n"
+    inputs = [
+        [HumanMessage(content=REPORT_ANALYSIS_PROMPT.format(report_text=report_texts[indices[0]]))]
+        for indices in pending.values()
+    ]
     
-    # Detailed system prompt for thorough history taking
-    system_prompt = f"""You are Dr. Khan, an experienced physician with 20+ years of practice. Your consultation style is thorough, empathetic, and detailed.
+    # One batch runs the Gemini round-trips concurrently instead of one after another
+    responses = llm.batch(inputs, config={"max_concurrency": 8}, return_exceptions=True)
+    for (key, indices), response in zip(pending.items(), responses):
+        if isinstance(response, Exception):
+            summary = REPORT_ANALYSIS_FALLBACK
+        else:
+            summary = response.content
+            with lock:
+                cache[key] = summary
+                if len(cache) > SUMMARY_CACHE_SIZE:
+                    cache.popitem(last=False)
+        for i in indices:
+            summaries[i] = summary
+    return summaries
+
+# =============================
+# 4. ENHANCED DOCTOR CHATBOT
+# =============================
+
+# Detailed system prompt for thorough history taking
+DOCTOR_SYSTEM_PROMPT = """You are Dr. Khan, an experienced physician with 20+ years of practice. Your consultation style is thorough, empathetic, and detailed.
 
 {reports_context}
 
@@ -197,6 +268,58 @@ Remember:
 - Use simple language, explain medical terms
 - NEVER ask multiple questions at once
 - Build conversation naturally based on patient's answers"""
+
+CHAT_FALLBACK = "I apologize for the technical difficulty. Could you please repeat that?"
+CHAT_INTERRUPTED_NOTE = "\n\n⚠️ *[Reply interrupted - please ask Dr. Khan to continue.]*"
+
+# Fixed report template, built once at import
+REPORT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a senior physician creating a detailed medical report. Based on the consultation transcript and previous reports, create a comprehensive report covering:
+
+        1. Patient Summary: Complete overview of the case
+        2. Extracted Symptoms: Detailed list of all symptoms with characteristics
+        3. Severity Level: Overall severity assessment (Low/Moderate/High)
+        4. Possible Conditions: Differential diagnoses with reasoning
+        5. Recommended Tests: Specific investigations needed
+        6. Treatment Suggestions: Detailed management plan
+        7. Urgent Warnings: Any red flags requiring immediate attention
+        8. Patient Demographics: Age, gender, relevant details
+        9. Duration of Symptoms: Timeline of current illness
+        10. Previous Treatments: Any treatments already tried
+        11. Medical History: Past medical conditions, surgeries
+        12. Allergies: Any known allergies
+        13. Current Medications: Ongoing medications
+        14. Family History: Relevant family medical history
+        15. Lifestyle Factors: Smoking, alcohol, diet, exercise
+        16. Doctor Notes: Additional clinical observations
+        17. Previous Reports Summary: Key findings from past reports
+
+        Be thorough and professional, as this will be used for clinical decision-making."""),
+    ("human", "{input}")
+])
+
+@st.cache_resource
+def get_report_chain():
+    """Bind the structured-output schema and prompt once per process"""
+    structured_llm = get_llm(0.1).with_structured_output(MedicalAnalysisSchema)
+    return REPORT_PROMPT | structured_llm
+
+def stream_chat_response(messages: List, user_input: str, uploaded_reports: List = None,
+                         stream_status: Dict = None) -> Iterator[str]:
+    """Stream response from Gemini; sets stream_status["interrupted"] if it breaks mid-reply"""
+    if not API_KEY:
+        raise ValueError("API Key missing!")
+    
+    llm = get_llm(0.3)
+    
+    # Add context about uploaded reports
+    reports_context = ""
+    if uploaded_reports and len(uploaded_reports) > 0:
+        reports_context = "\n\nPREVIOUS MEDICAL REPORTS UPLOADED:\n"
+        for i, report in enumerate(uploaded_reports, 1):
+            reports_context += f"Report {i} ({report['filename']}): {report['summary'][:300]}...\n"
+    
+    system_prompt = DOCTOR_SYSTEM_PROMPT.format(reports_context=reports_context)
     
     # Create messages list
     langchain_messages = [HumanMessage(content=system_prompt)]
@@ -211,11 +334,20 @@ Remember:
     # Add current user input
     langchain_messages.append(HumanMessage(content=f"Patient: {user_input}"))
     
+    # Yield tokens as they arrive so the reply renders before generation ends
+    streamed = False
     try:
-        response = llm.invoke(langchain_messages)
-        return response.content
+        for chunk in llm.stream(langchain_messages):
+            streamed = True
+            yield chunk.content
     except Exception as e:
-        return f"I apologize for the technical difficulty. Could you please repeat that?"
+        # Appending the apology to a partial reply would corrupt the transcript
+        if not streamed:
+            yield CHAT_FALLBACK
+        else:
+            logger.warning("Chat response stream ended early: %s", e)
+            if stream_status is not None:
+                stream_status["interrupted"] = True
 
 def generate_detailed_report(chat_history: List, uploaded_reports: List = None) -> MedicalAnalysisSchema:
     """Generate comprehensive medical report from chat"""
@@ -244,41 +376,7 @@ def generate_detailed_report(chat_history: List, uploaded_reports: List = None)
         role = "Patient" if msg["role"] == "user" else "Dr. Khan"
         conversation += f"{role}: {msg['content']}\n\n"
     
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=API_KEY,
-        temperature=0.1
-    )
-    
-    structured_llm = llm.with_structured_output(MedicalAnalysisSchema)
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a senior physician creating a detailed medical report. Based on the consultation transcript and previous reports, create a comprehensive report covering:
-
-        1. Patient Summary: Complete overview of the case
-        2. Extracted Symptoms: Detailed list of all symptoms with characteristics
-        3. Severity Level: Overall severity assessment (Low/Moderate/High)
-        4. Possible Conditions: Differential diagnoses with reasoning
-        5. Recommended Tests: Specific investigations needed
-        6. Treatment Suggestions: Detailed management plan
-        7. Urgent Warnings: Any red flags requiring immediate attention
-        8. Patient Demographics: Age, gender, relevant details
-        9. Duration of Symptoms: Timeline of current illness
-        10. Previous Treatments: Any treatments already tried
-        11. Medical History: Past medical conditions, surgeries
-        12. Allergies: Any known allergies
-        13. Current Medications: Ongoing medications
-        14. Family History: Relevant family medical history
-        15. Lifestyle Factors: Smoking, alcohol, diet, exercise
-        16. Doctor Notes: Additional clinical observations
-        17. Previous Reports Summary: Key findings from past reports
-
-        Be thorough and professional, as this will be used for clinical decision-making."""),
-        ("human", "{input}")
-    ])
-    
-    chain = prompt | structured_llm
-    return chain.invoke({"input": conversation})
+    return get_report_chain().invoke({"input": conversation})
 
 # =============================
 # 5. PDF GENERATION
@@ -473,25 +571,52 @@ def display_detailed_results(result_data: MedicalAnalysisSchema):
             st.success("✅ No urgent warnings identified")
 
 # =============================
-# 6. CLEAR FUNCTION
+# 6. DATA STORAGE
+# =============================
+
+PATIENTS_DATA_FILE = "all_patients_data.jsonl.gz"
+
+# Reports contain patient health data, so saving them to disk is opt-in
+SAVE_CONSULTATIONS = os.getenv("SAVE_CONSULTATIONS", "").strip().lower() in ("1", "true", "yes")
+
+def save_consultation(entry: Dict):
+    """Append one consultation record as a gzip-compressed JSON line (O(1) per report)"""
+    line = orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+    # Concatenated gzip members form one valid stream; read back with gzip.open()
+    with open(PATIENTS_DATA_FILE, "ab") as f:
+        f.write(gzip.compress(line))
+
+@st.cache_resource
+def get_storage_executor() -> ThreadPoolExecutor:
+    """One writer thread per process, so appends stay in order"""
+    return ThreadPoolExecutor(max_workers=1)
+
+def log_save_failure(future: Future):
+    """Report errors from the background writer instead of dropping them"""
+    error = future.exception()
+    if error is not None:
+        logger.error("Failed to save consultation to %s", PATIENTS_DATA_FILE, exc_info=error)
+
+# =============================
+# 7. CLEAR FUNCTION
 # =============================
 
 def clear_all():
     """Clear all session state and reset for new patient"""
-    for key in ['messages', 'analysis_result', 'extracted_text', 
-                'report_generated', 'show_report', 'uploaded_reports']:
+    for key in ['messages', 'analysis_result', 'analysis_json', 'report_pdf', 'extracted_text', 
+                'report_generated', 'show_report', 'uploaded_reports', 'chat_window']:
         if key in st.session_state:
             del st.session_state[key]
     st.rerun()
 
 # =============================
-# 7. STREAMLIT APP
+# 8. STREAMLIT APP
 # =============================
 
 st.set_page_config(page_title="Dr. Khan - Detailed Medical Consultation", page_icon="👨‍⚕️", layout="wide")
 
 # Custom CSS
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main { background-color: #f8f9fa; }
     
@@ -570,21 +695,34 @@ st.markdown("""
         color: white;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Streamlit drops any element a rerun does not re-emit, so the style tag
+# cannot be skipped after the first run and is re-sent on every rerun.
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Only the most recent messages are rendered; older ones load on request
+CHAT_PAGE_SIZE = 20
+
+GREETING_TEXT = "👨‍⚕️ **Good morning! I'm Dr. Khan.** Please have a seat. Tell me, what brings you to see me today? Take your time and describe what you've been experiencing."
 
 # Initialize session states
 if 'messages' not in st.session_state:
-    st.session_state.messages = [
-        {"role": "assistant", "content": "👨‍⚕️ **Good morning! I'm Dr. Khan.** Please have a seat. Tell me, what brings you to see me today? Take your time and describe what you've been experiencing."}
-    ]
+    st.session_state.messages = [{"role": "assistant", "content": GREETING_TEXT}]
 if 'analysis_result' not in st.session_state:
     st.session_state.analysis_result = None
+if 'analysis_json' not in st.session_state:
+    st.session_state.analysis_json = None
+if 'report_pdf' not in st.session_state:
+    st.session_state.report_pdf = None
 if 'show_report' not in st.session_state:
     st.session_state.show_report = False
 if 'report_generated' not in st.session_state:
     st.session_state.report_generated = False
 if 'uploaded_reports' not in st.session_state:
     st.session_state.uploaded_reports = []
+if 'chat_window' not in st.session_state:
+    st.session_state.chat_window = CHAT_PAGE_SIZE
 
 # Check API Key
 if not API_KEY:
@@ -628,8 +766,14 @@ with chat_col:
     st.subheader("💬 Detailed Consultation with Dr. Khan")
     st.caption("Dr. Khan will ask you questions one by one to understand your condition thoroughly.")
     
-    # Display chat messages
-    for message in st.session_state.messages:
+    # Display chat messages (windowed, so long consultations stay cheap to rerun)
+    hidden = len(st.session_state.messages) - st.session_state.chat_window
+    if hidden > 0:
+        if st.button(f"⬆️ Show earlier messages ({hidden} hidden)", key="show_earlier"):
+            st.session_state.chat_window += CHAT_PAGE_SIZE
+            st.rerun()
+    
+    for message in st.session_state.messages[-st.session_state.chat_window:]:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
     
@@ -646,19 +790,25 @@ with chat_col:
             
             # Get doctor's response
             with st.chat_message("assistant"):
-                with st.spinner("Dr. Khan is listening and thinking..."):
-                    try:
-                        response = get_chat_response(
-                            st.session_state.messages[:-1], 
-                            prompt,
-                            st.session_state.uploaded_reports
-                        )
-                        st.markdown(response)
-                        st.session_state.messages.append({"role": "assistant", "content": response})
-                    except Exception as e:
-                        error_msg = "I apologize, but I'm having a technical difficulty. Could you please repeat that?"
-                        st.error(error_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                try:
+                    stream_status = {"interrupted": False}
+                    stream = stream_chat_response(
+                        st.session_state.messages[:-1], 
+                        prompt,
+                        st.session_state.uploaded_reports,
+                        stream_status
+                    )
+                    # Keep the spinner up until the first token arrives
+                    with st.spinner("Dr. Khan is listening and thinking..."):
+                        first_chunk = next(stream, "")
+                    response = st.write_stream(itertools.chain([first_chunk], stream))
+                    if stream_status["interrupted"]:
+                        # Keep the partial text but mark it, in the chat and the report transcript
+                        response += CHAT_INTERRUPTED_NOTE
+                    st.session_state.messages.append({"role": "assistant", "content": response})
+                except Exception as e:
+                    st.error(CHAT_FALLBACK)
+                    st.session_state.messages.append({"role": "assistant", "content": CHAT_FALLBACK})
             
             st.rerun()
     st.markdown('</div>', unsafe_allow_html=True)
@@ -670,49 +820,77 @@ with tools_col:
     st.subheader("📁 Upload Medical Reports")
     st.markdown('<div class="upload-box">', unsafe_allow_html=True)
     
-    uploaded_files = st.file_uploader(
-        "Upload previous reports (PDF, Images)",
-        type=["pdf", "png", "jpg", "jpeg", "txt"],
-        accept_multiple_files=True,
-        key="report_uploader"
-    )
+    # A form collects the whole selection and only reruns on submit
+    with st.form("report_upload_form", clear_on_submit=True):
+        uploaded_files = st.file_uploader(
+            "Upload previous reports (PDF, Images)",
+            type=["pdf", "png", "jpg", "jpeg", "txt"],
+            accept_multiple_files=True,
+            key="report_uploader"
+        )
+        st.form_submit_button("🔍 Analyze Reports", use_container_width=True)
     
-    if uploaded_files:
-        for file in uploaded_files:
-            if not any(f['filename'] == file.name for f in st.session_state.uploaded_reports):
-                with st.spinner(f"Analyzing {file.name}..."):
-                    if file.type == "application/pdf":
-                        text = extract_text_from_pdf(file)
-                    else:
-                        text = extract_text_from_image(file)
-                    
-                    if text and not text.startswith("Error"):
-                        summary = analyze_medical_report(text)
-                        
-                        st.session_state.uploaded_reports.append({
-                            'filename': file.name,
-                            'text': text[:500] + "...",
-                            'summary': summary
-                        })
-                        
-                        report_msg = f"I've uploaded my previous medical report: {file.name}"
-                        st.session_state.messages.append({"role": "user", "content": report_msg})
-                        
-                        st.success(f"✅ {file.name} uploaded!")
-                    else:
-                        st.error(f"Could not read {file.name}")
+    # The form returns each selection once; skip files already attached by name
+    known_names = {r['filename'] for r in st.session_state.uploaded_reports}
+    new_files = []
+    for file in uploaded_files or []:
+        if file.name in known_names:
+            continue
+        known_names.add(file.name)
+        new_files.append(file)
+    if new_files:
+        readable = []
+        with st.spinner(f"Analyzing {len(new_files)} report(s)..."):
+            for file in new_files:
+                if file.type == "application/pdf":
+                    text = extract_text_from_pdf(file)
+                else:
+                    text = extract_text_from_image(file)
+                
+                if text and not text.startswith("Error") and is_readable_report(text):
+                    readable.append((file.name, text))
+                else:
+                    st.error(f"Could not read {file.name}")
+            
+            summaries = analyze_medical_reports([text for _, text in readable]) if readable else []
+        
+        for (filename, text), summary in zip(readable, summaries):
+            st.session_state.uploaded_reports.append({
+                'filename': filename,
+                'text': text[:500] + "...",
+                'summary': summary
+            })
+            
+            report_msg = f"I've uploaded my previous medical report: {filename}"
+            st.session_state.messages.append({"role": "user", "content": report_msg})
+            
+            st.success(f"✅ {filename} uploaded!")
     
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Display uploaded reports
     if st.session_state.uploaded_reports:
         st.subheader("📋 Uploaded Reports")
-        for i, report in enumerate(st.session_state.uploaded_reports):
-            with st.expander(f"📄 {report['filename'][:30]}"):
-                st.info(report['summary'][:200] + "...")
-                if st.button(f"Remove", key=f"remove_{i}"):
-                    st.session_state.uploaded_reports.pop(i)
-                    st.rerun()
+        # One table widget instead of an expander + button per report
+        st.dataframe(
+            [
+                {"File": report['filename'], "Summary": report['summary'][:200] + "..."}
+                for report in st.session_state.uploaded_reports
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        remove_idx = st.selectbox(
+            "Remove a report",
+            options=range(len(st.session_state.uploaded_reports)),
+            format_func=lambda i: st.session_state.uploaded_reports[i]['filename'],
+            index=None,
+            placeholder="Select a report to remove"
+        )
+        if remove_idx is not None and st.button("Remove", key="remove_report"):
+            st.session_state.uploaded_reports.pop(remove_idx)
+            st.rerun()
     
     st.markdown("---")
     
@@ -779,7 +957,21 @@ if st.session_state.show_report:
                     st.session_state.uploaded_reports
                 )
                 st.session_state.analysis_result = result
+                # Dump once; the indented download bytes are built here, not per rerun,
+                # and the log line serializes the same dict compactly
+                analysis_data = result.model_dump()
+                st.session_state.analysis_json = orjson.dumps(
+                    analysis_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                )
                 st.session_state.report_generated = True
+                if SAVE_CONSULTATIONS:
+                    # Write in the background; the report renders without waiting on disk
+                    save_future = get_storage_executor().submit(save_consultation, {
+                        "timestamp": datetime.now().isoformat(timespec="seconds"),
+                        "uploaded_reports": [r['filename'] for r in st.session_state.uploaded_reports],
+                        "analysis": analysis_data
+                    })
+                    save_future.add_done_callback(log_save_failure)
                 st.balloons()
                 st.success("✅ Comprehensive report ready!")
             except Exception as e:
@@ -788,13 +980,16 @@ if st.session_state.show_report:
     if st.session_state.analysis_result:
         display_detailed_results(st.session_state.analysis_result)
         
-        # Download PDF
-        pdf_buffer = generate_pdf(
-            st.session_state.analysis_result, 
-            st.session_state.messages,
-            st.session_state.uploaded_reports
-        )
-        b64 = base64.b64encode(pdf_buffer.read()).decode()
+        # Download PDF, rebuilt only when the uploaded documents it lists change
+        pdf_key = tuple(r['filename'] for r in st.session_state.uploaded_reports)
+        if st.session_state.report_pdf is None or st.session_state.report_pdf[0] != pdf_key:
+            pdf_buffer = generate_pdf(
+                st.session_state.analysis_result, 
+                st.session_state.messages,
+                st.session_state.uploaded_reports
+            )
+            st.session_state.report_pdf = (pdf_key, base64.b64encode(pdf_buffer.read()).decode())
+        b64 = st.session_state.report_pdf[1]
         
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
@@ -819,7 +1014,16 @@ if st.session_state.show_report:
                 ''', 
                 unsafe_allow_html=True
             )
-        
+
+            # Structured report as indented JSON, serialized once at generation
+            st.download_button(
+                "🧾 Download Report Data (JSON)",
+                data=st.session_state.analysis_json,
+                file_name=f"DrKhan_Report_{datetime.now().strftime('%Y%m%d_%H%M')}.json",
+                mime="application/json",
+                use_container_width=True
+            )
+
         if st.button("🆕 Start New Consultation", use_container_width=True):
             clear_all()
     